@@ -25,35 +25,30 @@ parser.add_argument("--domain-rand", action="store_true", help="enable domain ra
 parser.add_argument("--dynamics_rand", action="store_true", help="enable dynamics randomization")
 parser.add_argument("--frame-skip", default=1, type=int, help="number of frames to skip")
 parser.add_argument("--seed", default=1, type=int, help="seed")
-args = parser.parse_args()
-
-env = DuckietownEnv(
-    seed=args.seed,
-    map_name=args.map_name,
-    draw_curve=args.draw_curve,
-    draw_bbox=args.draw_bbox,
-    domain_rand=args.domain_rand,
-    frame_skip=args.frame_skip,
-    distortion=args.distortion,
-    camera_rand=args.camera_rand,
-    dynamics_rand=args.dynamics_rand,
+parser.add_argument("--num-envs", default=1, type=int, help="number of environments to step in parallel")
+parser.add_argument(
+    "--render-every", default=0, type=int, help="render every K steps, single env only (default: never)"
 )
 
-env.reset()
-env.render()
 
-while True:
-    """
-    This function is called at every frame to handle
-    movement/stepping and redrawing
-    """
-    wheel_distance = 0.102
-    min_rad = 0.08
+def make_env(args, rank):
+    def _make():
+        return DuckietownEnv(
+            seed=args.seed + rank,
+            map_name=args.map_name,
+            draw_curve=args.draw_curve,
+            draw_bbox=args.draw_bbox,
+            domain_rand=args.domain_rand,
+            frame_skip=args.frame_skip,
+            distortion=args.distortion,
+            camera_rand=args.camera_rand,
+            dynamics_rand=args.dynamics_rand,
+        )
 
-    action = np.array([0.44, 0.0])
+    return _make
 
-    v1 = action[0]
-    v2 = action[1]
+
+def compute_shaped_action(v1, v2, wheel_distance, min_rad):
     # Limit radius of curvature
     if v1 == 0 or abs(v2 / v1) > (min_rad + wheel_distance / 2.0) / (min_rad - wheel_distance / 2.0):
         # adjust velocities evenly such that condition is fulfilled
@@ -61,18 +56,50 @@ while True:
         v1 += delta_v
         v2 -= delta_v
 
-    action[0] = v1
-    action[1] = v2
+    return np.array([v1, v2])
+
+
+# The commanded velocities never change, so shape the action once up front
+ACTION = compute_shaped_action(0.44, 0.0, wheel_distance=0.102, min_rad=0.08)
+
+# Subprocess workers re-import this module under spawn/forkserver, so only
+# the main process may build the environments and run the loop
+if __name__ == "__main__":
+    args = parser.parse_args()
+    if args.render_every and args.num_envs > 1:
+        parser.error("--render-every only works with a single environment (--num-envs 1)")
+    BATCH_ACTION = np.tile(ACTION, (args.num_envs, 1))
+
+    if args.num_envs > 1:
+        # One subprocess per env, so stepping and rendering are not serialized by the GIL
+        env = gym.vector.AsyncVectorEnv([make_env(args, i) for i in range(args.num_envs)])
+    else:
+        env = make_env(args, 0)()
+
+    env.reset()
+
+    while True:
+        """
+        This function is called at every frame to handle
+        movement/stepping and redrawing
+        """
+        if args.num_envs > 1:
+            obs, reward, done, info = env.step(BATCH_ACTION)
+            print("rewards=%s" % np.array2string(reward, precision=3))
+            if done.any():
+                print("done!")
+                break
+            continue
 
-    obs, reward, done, info = env.step(action)
-    print("step_count = %s, reward=%.3f" % (env.unwrapped.step_count, reward))
+        obs, reward, done, info = env.step(ACTION)
+        print("step_count = %s, reward=%.3f" % (env.unwrapped.step_count, reward))
 
-    if done:
-        print("done!")
-        env.reset()
-        env.render()
-        break
+        if done:
+            print("done!")
+            break
 
-    env.render()
+        # Observations come straight from step(), only render when asked to
+        if args.render_every and env.unwrapped.step_count % args.render_every == 0:
+            env.render()
 
-env.close()
+    env.close()
@@ -1,9 +1,20 @@
 #!/usr/bin/env python3
 import argparse
+import importlib.util
 import yaml
 import logging
 import os
+import numpy as np
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from random import Random
+
+try:
+    from yaml import CSafeDumper as YamlDumper
+except ImportError:
+    from yaml import SafeDumper as YamlDumper
+
 from duckietown_world import (
     get_DB18_nominal,
     get_DB18_uncalibrated,
@@ -15,22 +26,52 @@ from duckietown_world import (
     SE2Transform,
 )
 
-import networkx as nx
-
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 
 parser = argparse.ArgumentParser()
 parser.add_argument("--force", action="store_true", help="overwrite existing maps")
-parser.add_argument("--width", default=5, help="width of the map to generate")
-parser.add_argument("--height", default=5, help="height of the map to generate")
-parser.add_argument("--seed", default=None, help="seed for random generator")
+parser.add_argument("--width", default=5, type=int, help="width of the map to generate")
+parser.add_argument("--height", default=5, type=int, help="height of the map to generate")
+parser.add_argument("--seed", default=None, type=int, help="seed for random generator")
 parser.add_argument("--file-name", default="generated.yaml")
+parser.add_argument("--count", default=1, type=int, help="number of maps to generate, numbered after --file-name")
+parser.add_argument("--workers", default=None, type=int, help="processes to generate maps with (default: all cores)")
+parser.add_argument("--exhaustive", action="store_true", help="pick from all loops instead of sampling one (slow)")
+parser.add_argument("--jit", action="store_true", help="run the gen_cycle walkers compiled with numba")
 args = parser.parse_args()
+if args.jit and importlib.util.find_spec("numba") is None:
+    parser.error("--jit requires numba")
 
-rand = Random()
+rand = Random(args.seed)
+# Bulk and array draws go through NumPy. rand serves the scalar draws, mainly
+# sample_loop's flip loop, where randrange is cheaper than Generator.integers
+rng = np.random.default_rng(args.seed)
 
 TILE_SIZE = 0.585
 
+# Tile names by (north, east, south, west) connectivity
+CONN_TO_TILE = {
+    (False, True, False, True): "straight/E",
+    (True, False, True, False): "straight/S",
+    (True, True, False, False): "curve_left/S",
+    (False, True, True, False): "curve_left/W",
+    (False, False, True, True): "curve_left/N",
+    (True, False, False, True): "curve_left/E",
+    (True, True, True, False): "3way_left/S",
+    (False, True, True, True): "3way_left/W",
+    (True, False, True, True): "3way_left/N",
+    (True, True, False, True): "3way_left/E",
+    (True, True, True, True): "4way/E",
+}
+
+def conn_nibble(n: int, e: int, s: int, w: int) -> int:
+    return (n << 3) | (e << 2) | (s << 1) | w
+
+# The same tiles indexed by connectivity nibble, unknown combinations are left empty.
+TILE_BY_NIBBLE = [""] * 16
+for conn, tile in CONN_TO_TILE.items():
+    TILE_BY_NIBBLE[conn_nibble(*conn)] = tile
+
 def save_map(map_path: str, map_data: MapFormat1):
     assert map_path.endswith(".yaml")
     if os.path.exists(map_path) and os.path.isfile(map_path):
@@ -41,7 +82,7 @@ def save_map(map_path: str, map_data: MapFormat1):
     logging.debug(f"Writing map to {map_path}")
 
     with open(map_path, "w") as f:
-        yaml.dump(map_data, f, default_flow_style=None)
+        yaml.dump(map_data, f, Dumper=YamlDumper, default_flow_style=None)
 
 def neighs(x: int, y: int):
     return [(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)]
@@ -52,33 +93,158 @@ def is_set(l: List[List[bool]], x: int, y: int) -> bool:
     else:
         return l[y][x]
 
+NEIGH_OFFSETS = np.array([[1, 0], [-1, 0], [0, 1], [0, -1]], dtype=np.int32)
+
+def _count_set_nb(grid: np.ndarray, x: int, y: int) -> int:
+    h, w = grid.shape
+    count = 0
+    for k in range(4):
+        nx_ = x + NEIGH_OFFSETS[k, 0]
+        ny_ = y + NEIGH_OFFSETS[k, 1]
+        if 0 <= nx_ < w and 0 <= ny_ < h and grid[ny_, nx_]:
+            count += 1
+    return count
+
+def _push_nb(stack: np.ndarray, queued: np.ndarray, slen: int, x: int, y: int) -> int:
+    if not queued[y, x]:
+        queued[y, x] = 1
+        stack[slen, 0] = x
+        stack[slen, 1] = y
+        slen += 1
+    return slen
+
+def _gen_cycle_nb(w: int, h: int, seed: int) -> np.ndarray:
+    np.random.seed(seed)
+    # 1 + position in track of every visited cell, 0 if unvisited
+    visited = np.zeros((h, w), dtype=np.int32)
+    track = np.empty((w * h, 2), dtype=np.int32)
+    x = np.random.randint(w)
+    y = np.random.randint(h)
+    track[0, 0] = x
+    track[0, 1] = y
+    tlen = 1
+    visited[y, x] = 1
+
+    while _count_set_nb(visited, x, y) < 2:
+        k = np.random.randint(4)
+        nx_ = x + NEIGH_OFFSETS[k, 0]
+        ny_ = y + NEIGH_OFFSETS[k, 1]
+        if nx_ < 0 or ny_ < 0 or nx_ >= w or ny_ >= h or tlen > 1 and nx_ == track[tlen - 2, 0] and ny_ == track[tlen - 2, 1]:
+            continue
+        track[tlen, 0] = nx_
+        track[tlen, 1] = ny_
+        tlen += 1
+        visited[ny_, nx_] = tlen
+        x, y = nx_, ny_
+
+    cycle_map = (visited > 0).astype(np.uint8)
+    for k in range(4):
+        nx_ = x + NEIGH_OFFSETS[k, 0]
+        ny_ = y + NEIGH_OFFSETS[k, 1]
+        if nx_ < 0 or ny_ < 0 or nx_ >= w or ny_ >= h or not visited[ny_, nx_]:
+            continue
+        if tlen > 1 and nx_ == track[tlen - 2, 0] and ny_ == track[tlen - 2, 1]:
+            continue
+        for i in range(visited[ny_, nx_] - 1):
+            cycle_map[track[i, 1], track[i, 0]] = 0
+    return cycle_map
+
+def _gen_cycle2_nb(w: int, h: int, seed: int) -> np.ndarray:
+    np.random.seed(seed)
+    cycle_map = np.zeros((h, w), dtype=np.uint8)
+    queued = np.zeros((h, w), dtype=np.uint8)
+    candidates = np.empty((w * h, 2), dtype=np.int32)
+    prevX = np.random.randint(w)
+    prevY = np.random.randint(h)
+    clen = _push_nb(candidates, queued, 0, prevX, prevY)
+    cycle_map[prevY, prevX] = 1
+
+    while clen:
+        clen -= 1
+        prevX = candidates[clen, 0]
+        prevY = candidates[clen, 1]
+        queued[prevY, prevX] = 0
+        if _count_set_nb(cycle_map, prevX, prevY) < 2:
+            k = np.random.randint(4)
+            x = prevX + NEIGH_OFFSETS[k, 0]
+            y = prevY + NEIGH_OFFSETS[k, 1]
+            if x < 0 or y < 0 or x >= w or y >= h:
+                clen = _push_nb(candidates, queued, clen, prevX, prevY)
+                continue
+            clen = _push_nb(candidates, queued, clen, x, y)
+            cycle_map[y, x] = 1
+        if _count_set_nb(cycle_map, prevX, prevY) < 2:
+            clen = _push_nb(candidates, queued, clen, prevX, prevY)
+
+    return cycle_map
+
+@lru_cache(maxsize=None)
+def _jit_walkers() -> None:
+    # numba takes a few hundred ms to import, so only pay for it once a walker
+    # actually runs. The kernels look each other up as globals, so rebind them
+    # all. cache=True keeps the machine code across runs.
+    global _count_set_nb, _push_nb, _gen_cycle_nb, _gen_cycle2_nb
+    from numba import njit
+
+    _count_set_nb = njit(cache=True)(_count_set_nb)
+    _push_nb = njit(cache=True)(_push_nb)
+    _gen_cycle_nb = njit(cache=True)(_gen_cycle_nb)
+    _gen_cycle2_nb = njit(cache=True)(_gen_cycle2_nb)
+
 def gen_cycle() -> List[List[bool]]:
+    """
+    Random walk until the track closes on itself, dropping the tail before the loop.
+
+    With --jit this runs _gen_cycle_nb instead, which draws from np.random
+    seeded by rand, so the map for a given --seed differs from the default walk.
+    """
+    if args.jit:
+        _jit_walkers()
+        return _gen_cycle_nb(args.width, args.height, rand.randrange(2 ** 31)).astype(bool).tolist()
     cycle_map = []
     for i in range(args.height):
         cycle_map.append([False] * args.width)
     prevX = rand.randrange(args.width)
     prevY = rand.randrange(args.height)
-    track = [(prevX, prevY)]
-    visited = {(prevX, prevY)}
+    # Flat, preallocated (x, y) pairs, a cell can only be visited once
+    track = array("i", [0]) * (2 * args.width * args.height)
+    track[0], track[1] = prevX, prevY
+    tlen = 1
+    # Position of every visited cell in track
+    pos = {(prevX, prevY): 0}
     cycle_map[prevY][prevX] = True
 
-    while (sum([i in visited for i in neighs(prevX, prevY)]) < 2):
-        x, y = rand.choice(neighs(prevX, prevY))
-        if x < 0 or y < 0 or x >= args.width or y >= args.height or len(track) > 1 and(x, y) == track[-2]:
+    ns = neighs(prevX, prevY)
+    while (sum(i in pos for i in ns) < 2):
+        x, y = rand.choice(ns)
+        if x < 0 or y < 0 or x >= args.width or y >= args.height or tlen > 1 and x == track[2 * tlen - 4] and y == track[2 * tlen - 3]:
             continue
-        track.append((x, y))
-        visited.add((x, y))
+        track[2 * tlen], track[2 * tlen + 1] = x, y
+        pos[(x, y)] = tlen
+        tlen += 1
         cycle_map[y][x] = True
         prevX, prevY = x, y
+        ns = neighs(prevX, prevY)
     
-    for x, y in neighs(prevX, prevY):
-        if (x, y) in visited and (x, y) not in track[-2:]:
-            for revX, revY in track[:track.index((x, y))]:
-                cycle_map[revY][revX] = False
+    for n in ns:
+        # Skip the previous and current cell, the last two entries of track
+        if pos.get(n, tlen) < tlen - 2:
+            for i in range(pos[n]):
+                cycle_map[track[2 * i + 1]][track[2 * i]] = False
 
     return cycle_map
 
 def gen_cycle2() -> List[List[bool]]:
+    """
+    Grow a road network from random candidates until each has two road neighbours.
+
+    With --jit this runs _gen_cycle2_nb instead, which draws from np.random
+    seeded by rand and pops candidates from a stack rather than a set, so the
+    map for a given --seed differs from the default walk.
+    """
+    if args.jit:
+        _jit_walkers()
+        return _gen_cycle2_nb(args.width, args.height, rand.randrange(2 ** 31)).astype(bool).tolist()
     cycle_map = []
     for i in range(args.height):
         cycle_map.append([False] * args.width)
@@ -89,14 +255,15 @@ def gen_cycle2() -> List[List[bool]]:
 
     while candidates:
         prevX, prevY = candidates.pop()
-        if (sum([is_set(cycle_map, xz, yz) for xz, yz in neighs(prevX, prevY)]) < 2):
-            x, y = rand.choice(neighs(prevX, prevY))
+        ns = neighs(prevX, prevY)
+        if (sum(is_set(cycle_map, xz, yz) for xz, yz in ns) < 2):
+            x, y = rand.choice(ns)
             if x < 0 or y < 0 or x >= args.width or y >= args.height:
                 candidates.add((prevX, prevY))
                 continue
             candidates.add((x, y))
             cycle_map[y][x] = True
-        if (sum([is_set(cycle_map, xz, yz) for xz, yz in neighs(prevX, prevY)]) < 2):
+        if (sum(is_set(cycle_map, xz, yz) for xz, yz in ns) < 2):
             candidates.add((prevX, prevY))
 
 
@@ -108,137 +275,162 @@ def full() -> List[List[Tuple[int, int, int, int]]]:
         cycle_map.append([(i != 0, True, i != args.height - 1, False)] + [(i != 0, True, i != args.height - 1, True)] * (args.width - 2) + [(i != 0, False, i != args.height - 1, True)])
     return cycle_map
 
-def empty() -> List[List[Tuple[int, int, int, int]]]:
-    cycle_map = []
-    for i in range(args.height):
-        # cycle_map.append([(i != 0, True, i != args.height - 1, False)] + [(i != 0, True, i != args.height - 1, True)] * (args.width - 2) + [(i != 0, False, i != args.height - 1, True)])
-        cycle_map.append([(False, False, False, False)] * args.width)
-    return cycle_map
-
-def edge_path_to_grid(edges: List[Tuple[int, int]]) -> List[List[Tuple[int, int, int, int]]]:
+def edges_to_tiles(edges: List[Tuple[int, int]], w: int, h: int) -> List[List[str]]:
+    # Connectivity of every loop cell from its two neighbours on the loop
+    tile_map = [["grass"] * w for _ in range(h)]
     c_len = len(edges)
-    cycle_map = empty()
-    for i in range(c_len):
-        neighs = [edges[i - 1], edges[(i + 1) % c_len]]
-        x, y = edges[i]
-        cycle_map[y][x] = ((x, y - 1) in neighs, (x + 1, y) in neighs, (x, y + 1) in neighs, (x - 1, y) in neighs)
-    return cycle_map
+    for i, (x, y) in enumerate(edges):
+        ends = (edges[i - 1], edges[(i + 1) % c_len])
+        nib = conn_nibble((x, y - 1) in ends, (x + 1, y) in ends, (x, y + 1) in ends, (x - 1, y) in ends)
+        tile_map[y][x] = TILE_BY_NIBBLE[nib]
+        if not tile_map[y][x]:
+            logging.error(f"Unknown tile: {x} {y}")
+    return tile_map
+
+@lru_cache(maxsize=None)
+def grid_adjacency(w: int, h: int) -> Dict[Tuple[int, int], Tuple[Tuple[int, int], ...]]:
+    # 4-connected w x h grid, what nx.grid_2d_graph builds but without the graph overhead
+    return {
+        (x, y): tuple((x + dx, y + dy) for dx, dy in NEIGH_OFFSETS.tolist() if 0 <= x + dx < w and 0 <= y + dy < h)
+        for x in range(w)
+        for y in range(h)
+    }
 
-def all_loops() -> List[List[Tuple[int, int, int, int]]]:
-    grid = nx.grid_2d_graph(args.width, args.height, create_using=nx.DiGraph)
+# Face flips per grid face in sample_loop, enough for the loop lengths to
+# match the exhaustive distribution
+LOOP_MIX_STEPS = 20
+
+def sample_loop(w: int, h: int, rand: Random) -> List[Tuple[int, int]]:
+    # Every loop encloses a hole-free set of unit faces. Starting from a single
+    # face, repeatedly toggle a random face and keep the result when the loop
+    # stays simple. The flips are symmetric, so this converges to a uniform
+    # pick over all loops without enumerating them.
+    if w < 2 or h < 2:
+        raise ValueError(f"No loops fit in a {w}x{h} grid")
+
+    def face_corners(fx: int, fy: int) -> Tuple[Tuple[int, int], ...]:
+        return ((fx, fy), (fx + 1, fy), (fx + 1, fy + 1), (fx, fy + 1))
+
+    def face_edges(corners: Tuple[Tuple[int, int], ...]) -> List[frozenset]:
+        return [frozenset((corners[i], corners[(i + 1) % 4])) for i in range(4)]
+
+    corners = face_corners(rand.randrange(w - 1), rand.randrange(h - 1))
+    edges = set(face_edges(corners))
+    nodes = set(corners)
+    for _ in range(LOOP_MIX_STEPS * (w - 1) * (h - 1)):
+        corners = face_corners(rand.randrange(w - 1), rand.randrange(h - 1))
+        fedges = face_edges(corners)
+        shared = [e in edges for e in fedges]
+        # The face must share one contiguous run of 1-3 edges with the loop
+        if not any(shared) or all(shared) or sum(shared[i] != shared[i - 1] for i in range(4)) != 2:
+            continue
+        # Corner i sits between edges i - 1 and i, the detour around the face
+        # must not touch the loop anywhere else
+        fresh = [corners[i] for i in range(4) if not shared[i - 1] and not shared[i]]
+        if any(c in nodes for c in fresh):
+            continue
+        nodes.difference_update(corners[i] for i in range(4) if shared[i - 1] and shared[i])
+        nodes.update(fresh)
+        edges.symmetric_difference_update(fedges)
+
+    adj = {}
+    for a, b in map(tuple, edges):
+        adj.setdefault(a, []).append(b)
+        adj.setdefault(b, []).append(a)
+    start = next(iter(nodes))
+    loop = [start, adj[start][0]]
+    while True:
+        a, b = adj[loop[-1]]
+        node = b if a == loop[-2] else a
+        if node == start:
+            return loop
+        loop.append(node)
+
+@lru_cache(maxsize=None)
+def all_loops(w: int, h: int) -> Tuple[Tuple[Tuple[int, int], ...], ...]:
+    import networkx as nx
+
+    grid = nx.DiGraph(grid_adjacency(w, h))
     # Not uniform over same shape cycles, for example there are lots of 2x2 cycles.
     # Furthermore, they are directed, so all undirected cycles appear twice
     # (unsure if different starting points count as distinct cycles, assuming not)
-    return list(nx.simple_cycles(grid))
+    # Back-and-forth 2-cycles along a single edge are not loops.
+    return tuple(
+        tuple(c)
+        for scc in nx.strongly_connected_components(grid)
+        if len(scc) > 1
+        for c in nx.simple_cycles(grid.subgraph(scc))
+        if len(c) >= 4
+    )
 
-def check(bool_map: List[List[bool]], x: int, y: int, n: int, e: int, s: int, w: int) -> bool:
-    ee = bool_map[y][x + 1] if x + 1 < args.width else 0
-    ww = bool_map[y][x - 1] if x - 1 >= 0 else 0
-    ss = bool_map[y + 1][x] if y + 1 < args.height else 0
-    nn = bool_map[y - 1][x] if y - 1 >= 0 else 0
-    return ee == e and ww == w and nn == n and ss == s
+def nibbles_to_tiles(nib: np.ndarray, mask: np.ndarray) -> List[List[str]]:
+    tiles = np.take(TILE_BY_NIBBLE, nib)
+    for y, x in np.argwhere(mask & (tiles == "")):
+        logging.error(f"Unknown tile: {x} {y}")
+    return np.where(mask, tiles, "grass").tolist()
 
 def map_transform(bool_map: List[List[bool]]) -> List[List[str]]:
-    tile_map = []
-    for i in range(args.height):
-        tile_map.append(["grass"] * args.width)
-    
-    for y in range(args.height):
-        for x in range(args.width):
-            if bool_map[y][x]:
-                if check(bool_map, x, y, 0, 1, 0, 1):
-                    tile_map[y][x] = "straight/E"
-                elif check(bool_map, x, y, 1, 0, 1, 0):
-                    tile_map[y][x] = "straight/S"
-                elif check(bool_map, x, y, 1, 1, 0, 0):
-                    tile_map[y][x] = "curve_left/S"
-                elif check(bool_map, x, y, 0, 1, 1, 0):
-                    tile_map[y][x] = "curve_left/W"
-                elif check(bool_map, x, y, 0, 0, 1, 1):
-                    tile_map[y][x] = "curve_left/N"
-                elif check(bool_map, x, y, 1, 0, 0, 1):
-                    tile_map[y][x] = "curve_left/E"
-                elif check(bool_map, x, y, 1, 1, 1, 0):
-                    tile_map[y][x] = "3way_left/S"
-                elif check(bool_map, x, y, 0, 1, 1, 1):
-                    tile_map[y][x] = "3way_left/W"
-                elif check(bool_map, x, y, 1, 0, 1, 1):
-                    tile_map[y][x] = "3way_left/N"
-                elif check(bool_map, x, y, 1, 1, 0, 1):
-                    tile_map[y][x] = "3way_left/E"
-                elif check(bool_map, x, y, 1, 1, 0, 1):
-                    tile_map[y][x] = "4way/E"
-                else:
-                    tile_map[y][x] = ""
-                    logging.error(f"Unknown tile: {x} {y}")
-    return tile_map
+    ext = np.pad(np.array(bool_map, dtype=np.uint8), 1)
+    nib = (ext[:-2, 1:-1] << 3) | (ext[1:-1, 2:] << 2) | (ext[2:, 1:-1] << 1) | ext[1:-1, :-2]
+    return nibbles_to_tiles(nib, ext[1:-1, 1:-1].astype(bool))
 
-def graph_transform(conn_map: List[List[Tuple[int, int, int, int]]]) -> List[List[str]]:
-    tile_map = []
-    for _ in range(args.height):
-        tile_map.append(["grass"] * args.width)
-    
-    for y in range(args.height):
-        for x in range(args.width):
-            if conn_map[y][x] == (False,False,False,False):
-                tile_map[y][x] = "grass"
-            elif conn_map[y][x] == (False, True, False, True):
-                tile_map[y][x] = "straight/E"
-            elif conn_map[y][x] == (True, False, True, False):
-                tile_map[y][x] = "straight/S"
-            elif conn_map[y][x] == (True, True, False, False):
-                tile_map[y][x] = "curve_left/S"
-            elif conn_map[y][x] == (False, True, True, False):
-                tile_map[y][x] = "curve_left/W"
-            elif conn_map[y][x] == (False, False, True, True):
-                tile_map[y][x] = "curve_left/N"
-            elif conn_map[y][x] == (True, False, False, True):
-                tile_map[y][x] = "curve_left/E"
-            elif conn_map[y][x] == (True, True, True, False):
-                tile_map[y][x] = "3way_left/S"
-            elif conn_map[y][x] == (False, True, True, True):
-                tile_map[y][x] = "3way_left/W"
-            elif conn_map[y][x] == (True, False, True, True):
-                tile_map[y][x] = "3way_left/N"
-            elif conn_map[y][x] == (True, True, False, True):
-                tile_map[y][x] = "3way_left/E"
-            elif conn_map[y][x] == (True, True, False, True):
-                tile_map[y][x] = "4way/E"
-            else:
-                tile_map[y][x] = ""
-                logging.error(f"Unknown tile: {x} {y}")
-    return tile_map
-
-def object_placement(n: int, min_dist: float, possible_tiles: List[Tuple[int, int]]) -> List[Tuple[float, float]]:
-    ducks = []
+def object_placement(n: int, min_dist: float, possible_tiles: List[Tuple[int, int]], rng: np.random.Generator) -> List[Tuple[float, float]]:
+    tiles = np.asarray(possible_tiles, dtype=np.float64)
+    xs = np.empty(n)
+    ys = np.empty(n)
+    count = 0
     min_dist_sq = min_dist * min_dist
     for _ in range(n):
-        for _ in range(50): # Max tries
-            xoff = rand.random() * TILE_SIZE
-            yoff = rand.random() * TILE_SIZE
-            startX, startY = rand.choice(possible_tiles)
-            x, y = startX * TILE_SIZE + xoff, startY * TILE_SIZE + yoff
-            if (all(map(lambda o: (x-o[0])**2 + (y-o[1])**2 > min_dist_sq, ducks))):
-                ducks.append((x, y))
-                break
-    return ducks
+        # Draw all 50 tries at once and keep the first one far enough from the others
+        picks = rng.integers(len(tiles), size=50)
+        cand_x = (tiles[picks, 0] + rng.random(50)) * TILE_SIZE
+        cand_y = (tiles[picks, 1] + rng.random(50)) * TILE_SIZE
+        if count:
+            dist_sq = (cand_x[:, None] - xs[:count]) ** 2 + (cand_y[:, None] - ys[:count]) ** 2
+            hits = np.flatnonzero(dist_sq.min(1) > min_dist_sq)
+            if not hits.size:
+                continue
+            cand_x = cand_x[hits]
+            cand_y = cand_y[hits]
+        xs[count] = cand_x[0]
+        ys[count] = cand_y[0]
+        count += 1
+    return list(zip(xs[:count].tolist(), ys[:count].tolist()))
 
 def gen_map():
     map_dict: MapFormat1 = {}
 
     map_dict["tile_size"] = TILE_SIZE
-    edges = rand.choice(all_loops())
-    map_dict["tiles"] = graph_transform(edge_path_to_grid(edges))
+    if args.exhaustive:
+        loops = all_loops(args.width, args.height)
+        edges = loops[rng.integers(len(loops))]
+    else:
+        edges = sample_loop(args.width, args.height, rand)
+    map_dict["tiles"] = edges_to_tiles(edges, args.width, args.height)
     
     map_dict["objects"] = list(map(lambda x: {
         "height": 0.06,
         "kind": "duckie",
         "optional": False,
         "pos": [x[0], x[1]],
-        "rotate": rand.randrange(0, 360),
+        "rotate": int(rng.integers(0, 360)),
         "static": True
-    }, object_placement(5, 10, edges)))
+    }, object_placement(5, 10, edges, rng)))
     return map_dict
 
+def _one_map(seed: int) -> MapFormat1:
+    # Every worker process has its own module state, so reseeding is enough
+    global rng
+    rand.seed(seed)
+    rng = np.random.default_rng(seed)
+    return gen_map()
 
-save_map(args.file_name, gen_map())
\ No newline at end of file
+if __name__ == "__main__":
+    if args.count == 1:
+        save_map(args.file_name, gen_map())
+    else:
+        root, ext = os.path.splitext(args.file_name)
+        seeds = [rand.randrange(2 ** 32) for _ in range(args.count)]
+        with ProcessPoolExecutor(args.workers) as executor:
+            for i, map_data in enumerate(executor.map(_one_map, seeds)):
+                save_map(f"{root}_{i}{ext}", map_data)